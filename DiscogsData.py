@@ -0,0 +1,291 @@
+#-----------------------------------------------------------------------------#
+#   File: DiscogsData.py                                                      #
+#   Author: Logan Pierceall                                                   #
+#                                                                             #
+#   This module accompanies 'Window.py'. It handles all of the code that      #
+#       involves retrieving release information from the Discogs database.    #
+#       Consequently, this file depends on the 'discogs_client' API found at  #
+#       https://pypi.org/project/python3-discogs-client/                      #
+#                                                                             #
+#   None of the functions in this module touch any widgets, so they are safe  #
+#       to call from a worker thread.                                         #
+#                                                                             #
+#   'discogs_client' is imported by the functions that need it, so it only    #
+#       gets loaded once the user starts loading a release.                   #
+#-----------------------------------------------------------------------------#
+
+import dbm
+from itertools import islice
+import os
+import shelve
+import threading
+import time
+
+
+# On-disk cache of retrieved releases, so loading the same release again
+#   doesn't need another Discogs request. Cached releases expire after
+#   CACHE_TTL seconds
+CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache',
+                          'discogs-metatagger', 'releases')
+CACHE_TTL = 86400
+
+# Most tracks read from a single release. Anything past this (e.g., on a
+#   huge box set) is dropped instead of being title-cased and listed
+MAX_TRACKS = 500
+
+# Held while the cache file is open, since shelve doesn't support more than
+#   one thread accessing the file at a time
+CACHE_LOCK = threading.Lock()
+
+
+class RateLimiter:
+    """Keep Discogs API calls under the authenticated rate limit.
+    
+    Calls are spaced out using a token bucket that refills at 'rate' tokens
+        per 'per' seconds, so bursts of requests wait client-side instead of
+        being rejected by Discogs. Calls that still fail with a rate limit
+        (429) or server (5xx) error are retried with exponential backoff.
+    """
+    
+    def __init__(self, rate=55, per=60.0, max_attempts=5, base_delay=1.0):
+        
+        # Discogs allows 60 requests per minute for authenticated clients.
+        #   The default rate stays a little under that limit
+        self.capacity = rate
+        self.tokens = rate
+        self.refill_rate = rate / per
+        self.updated = time.monotonic()
+        
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        
+        # Worker threads may share the limiter
+        self.lock = threading.Lock()
+    
+    
+    def Acquire(self):
+        """Block until a request token is available, then consume it."""
+        
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens
+                                  + (now - self.updated) * self.refill_rate)
+                self.updated = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                # Sleep until the next token has been refilled
+                time.sleep((1 - self.tokens) / self.refill_rate)
+    
+    
+    def Call(self, func, *args, **kwargs):
+        """Call a function that makes a Discogs request, retrying on errors.
+        
+        Arguments:
+        func -- the function to call
+        *args, **kwargs -- the arguments passed to 'func'
+        
+        Returns:
+        The return value of 'func'
+        """
+        
+        from discogs_client.exceptions import HTTPError
+        
+        for attempt in range(self.max_attempts):
+            self.Acquire()
+            try:
+                return func(*args, **kwargs)
+            
+            except HTTPError as e:
+                # Only rate limit and server errors are worth retrying
+                retry = e.status_code == 429 or e.status_code >= 500
+                if not retry or attempt == self.max_attempts - 1:
+                    raise
+                
+                # On a rate limit error, empty the bucket so any other
+                #   threads sharing the limiter back off as well
+                if e.status_code == 429:
+                    self.Drain()
+                
+                time.sleep(min(60, 2 ** attempt * self.base_delay))
+    
+    
+    def Drain(self):
+        """Discard every remaining request token."""
+        
+        with self.lock:
+            self.tokens = 0
+            self.updated = time.monotonic()
+
+
+def ClearCache():
+    """Remove every release from the on-disk release cache."""
+    
+    with CACHE_LOCK:
+        try:
+            # Flag 'n' always creates a new, empty cache file
+            with OpenCache('n'):
+                pass
+        except dbm.error:
+            pass
+
+
+def FetchRelease(client, limiter, release_number):
+    """Retrieve the information used to fill the metadata widgets.
+    
+    Arguments:
+    client -- the authorized Discogs API client
+    limiter -- the RateLimiter used to space out Discogs requests
+    release_number -- the ID of the release to retrieve
+    
+    Returns:
+    'True' and a dict of the release information if successful
+    'False' and the HTTP status code if Discogs rejected the request or
+        sent a response that couldn't be read
+    'False' and 'None' if Discogs couldn't be reached
+    """
+    
+    from discogs_client.exceptions import (DiscogsAPIError,
+                                           TooManyAttemptsError)
+    
+    key = f'release:{release_number}'
+    data = GetCachedRelease(key)
+    if data is not None:
+        return True, data
+    
+    try:
+        data = limiter.Call(ReadRelease, client, release_number)
+    except TooManyAttemptsError:
+        # The client gave up after repeated rate limit (429) responses
+        return False, 429
+    except DiscogsAPIError as e:
+        # Both HTTP errors and responses that aren't valid JSON (e.g., an
+        #   HTML error page) carry the response's status code
+        return False, getattr(e, 'status_code', None)
+    except OSError:
+        # The 'requests' connection errors are subclasses of OSError
+        return False, None
+    
+    StoreRelease(key, data)
+    return True, data
+
+
+def GetCachedRelease(key):
+    """Retrieve a release from the on-disk cache if it hasn't expired.
+    
+    Arguments:
+    key -- the cache key for the release
+    
+    Returns:
+    The dict of release information if the release is cached
+    'None' if the release isn't cached, has expired, or the cache is
+        inaccessible
+    """
+    
+    with CACHE_LOCK:
+        try:
+            with OpenCache('c') as cache:
+                entry = cache.get(key)
+        except dbm.error:
+            return None
+    
+    if entry is None:
+        return None
+    
+    stored, data = entry
+    if time.time() - stored > CACHE_TTL:
+        return None
+    
+    return data
+
+
+def OpenCache(flag):
+    """Open the on-disk release cache. The caller must hold CACHE_LOCK.
+    
+    Arguments:
+    flag -- the shelve open flag ('c' to read/write, 'n' to start empty)
+    
+    Returns:
+    The open shelve object
+    """
+    
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    return shelve.open(CACHE_PATH, flag)
+
+
+def ReadRelease(client, release_number):
+    """Read the fields of a Discogs release into a dict of plain values.
+    
+    The Discogs client loads a release lazily. The release JSON is fetched
+        here with one explicit 'refresh()', and the fields are read from
+        the raw JSON instead of the client's model objects. The whole
+        request happens within this function, and the caller never
+        triggers one from the Tk thread.
+    
+    Arguments:
+    client -- the authorized Discogs API client
+    release_number -- the ID of the release to retrieve
+    
+    Returns:
+    A dict of the release information. Fields missing from the release
+        are left empty, and 'truncated' is set if the tracklist was cut
+        off at MAX_TRACKS
+    """
+    
+    release = client.release(release_number)
+    release.refresh()
+    info = release.data
+    
+    # Not every release lists an artist, style, and label
+    artists = info.get('artists') or []
+    styles = info.get('styles') or []
+    labels = info.get('labels') or []
+    
+    # Read one track past the limit to find out if any were dropped
+    tracks = info.get('tracklist') or []
+    tracklist = [TitleCase(track.get('title'))
+                 for track in islice(tracks, MAX_TRACKS + 1)]
+    truncated = len(tracklist) > MAX_TRACKS
+    
+    return {'artist': TitleCase(artists[0].get('name') if artists else ''),
+            'album': TitleCase(info.get('title')),
+            'genre': TitleCase(styles[0] if styles else ''),
+            'publisher': TitleCase(labels[0].get('name') if labels else ''),
+            'year': info.get('year'),
+            'tracklist': tracklist[:MAX_TRACKS],
+            'truncated': truncated}
+
+
+def StoreRelease(key, data):
+    """Add a release to the on-disk cache.
+    
+    A cache that can't be written is skipped silently, since the release
+        has already been retrieved.
+    
+    Arguments:
+    key -- the cache key for the release
+    data -- the dict of release information
+    """
+    
+    with CACHE_LOCK:
+        try:
+            with OpenCache('c') as cache:
+                cache[key] = (time.time(), data)
+        except dbm.error:
+            pass
+
+
+def TitleCase(text):
+    """Convert a release field to title case.
+    
+    Arguments:
+    text -- the field's string, which may be empty or 'None'
+    
+    Returns:
+    The title-cased string, or an empty string for an empty field
+    """
+    
+    return text.title() if text else ''
@@ -8,13 +8,123 @@
 #       https://mutagen.readthedocs.io/en/latest/                             #
 #-----------------------------------------------------------------------------#
 
+from dataclasses import dataclass
 import os
+import queue
+import threading
 
 import mutagen
 from mutagen import MutagenError
-from mutagen.flac import FLAC
-from mutagen.easyid3 import EasyID3
-from mutagen.mp3 import MP3
+
+
+# Mutagen song objects for every loaded file, keyed by the file path. Edits
+#   reuse these objects so the tags don't get re-read from disk every time
+SONG_CACHE = {}
+
+# Songs waiting to be written to disk by the background save threads, and
+#   the filenames of those songs so repeated edits only queue one save per file
+SAVE_QUEUE = queue.Queue()
+PENDING_SAVES = set()
+
+# Filenames of songs the background save threads were unable to write
+SAVE_ERRORS = queue.Queue()
+
+# Locks for every loaded file, keyed by the file path. A file's lock is held
+#   while its song object is being changed or saved, so a save thread never
+#   writes a song that is halfway through an update. Songs for different
+#   files are saved in parallel
+SONG_LOCKS = {}
+
+# Number of background save threads. Saving is mostly file I/O, which
+#   doesn't hold the GIL, so a few threads can write files concurrently
+SAVE_THREADS = 4
+
+# Treeview column heading IDs and the metadata tags they display. Column '#2'
+#   holds the filename, which isn't a metadata tag
+COL_TO_TAG = {'#1': 'TrackNumber',
+              '#3': 'Title',
+              '#4': 'Artist',
+              '#5': 'AlbumArtist',
+              '#6': 'Album',
+              '#7': 'Date',
+              '#8': 'Genre',
+              '#9': 'Organization'}
+TAG_TO_COL = {tag: col for col, tag in COL_TO_TAG.items()}
+
+# Treeview row tags for even and odd rows, indexed by the row's parity
+ROW_TAGS = ('evenrow', 'oddrow')
+
+# Metadata tags that only hold a single value
+SCALAR_TAGS = ('TrackNumber', 'Title', 'Album', 'Date', 'Organization')
+
+# Metadata tags that may hold more than one value
+MULTI_TAGS = ('Artist', 'AlbumArtist', 'Genre')
+
+
+@dataclass(frozen=True, slots=True)
+class FileMeta:
+    """The metadata read from a single music file.
+    
+    This holds everything needed to display the file in the Treeview, so
+        files can be parsed away from the Tk thread and inserted later.
+    """
+    
+    track_no: str
+    short_name: str
+    title: str
+    artist: str
+    album_artist: str
+    album: str
+    date: str
+    genre: str
+    publisher: str
+    iid: str
+    row_tag: str
+    
+    @property
+    def values(self):
+        """The Treeview column values, in column order '#1' to '#9'."""
+        
+        return (self.track_no, self.short_name, self.title, self.artist,
+                self.album_artist, self.album, self.date, self.genre,
+                self.publisher)
+
+
+def BatchUpdateMetadata(updates):
+    """Apply a group of metadata tag updates, saving each file only once.
+    
+    The saves are queued for the background save threads, so this function
+        returns without waiting for the files to be written.
+    
+    Arguments:
+    updates -- list of (file, tag, value) tuples to apply
+    
+    Returns:
+    A list of the filenames that were inaccessible
+    """
+    
+    # Group the updates by file, keeping the order the files were given in
+    grouped = {}
+    for file, tag, value in updates:
+        grouped.setdefault(file, []).append((tag, value))
+    
+    bad_files = []
+    for file, tags in grouped.items():
+        song = GetSong(file)
+        if song is None:
+            bad_files.append(file)
+            continue
+        
+        # Only rewrite the file if at least one of the tags changed
+        with GetLock(file):
+            changed = False
+            for tag, value in tags:
+                if SetTag(song, tag, value):
+                    changed = True
+            if changed:
+                QueueSave(song)
+    
+    return bad_files
 
 
 def ConvertColToTag(column):
@@ -27,22 +137,7 @@ def ConvertColToTag(column):
     The metadata tag corresponding to the Treeview column
     """
 
-    if column == '#1':
-        return 'TrackNumber'
-    elif column == '#3':
-        return 'Title'
-    elif column == '#4':
-        return 'Artist'
-    elif column == '#5':
-        return 'AlbumArtist'
-    elif column == '#6':
-        return 'Album'
-    elif column == '#7':
-        return 'Date'
-    elif column == '#8':
-        return 'Genre'
-    elif column == '#9':
-        return 'Organization'
+    return COL_TO_TAG.get(column)
 
 
 def ConvertTagToCol(tag):
@@ -55,26 +150,125 @@ def ConvertTagToCol(tag):
     The Treeview column heading corresponding to the metadata tag
     """
 
-    if tag == 'TrackNumber':
-        return '#1'
-    elif tag == 'Title':
-        return '#3'
-    elif tag == 'Artist':
-        return '#4'
-    elif tag == 'AlbumArtist':
-        return '#5'
-    elif tag == 'Album':
-        return '#6'
-    elif tag == 'Date':
-        return '#7'
-    elif tag == 'Genre':
-        return '#8'
-    elif tag == 'Organization':
-        return '#9'
+    return TAG_TO_COL.get(tag)
+
+
+def FlushSaves():
+    """Block until every queued song has been written to disk."""
+    
+    SAVE_QUEUE.join()
+
+
+def ForgetFiles(files):
+    """Remove the cached song objects and locks for files no longer in use.
+    
+    Arguments:
+    files -- the file paths to remove from the cache
+    """
+    
+    for file in files:
+        SONG_CACHE.pop(file, None)
+        SONG_LOCKS.pop(file, None)
+
+
+def GetLock(file):
+    """Return the lock for a file's song object, creating it if necessary.
+    
+    Arguments:
+    file -- the music file the lock guards
+    
+    Returns:
+    The file's lock
+    """
+    
+    lock = SONG_LOCKS.get(file)
+    if lock is None:
+        # 'setdefault()' is atomic, so threads racing to create the same
+        #   file's lock all end up with the one that gets stored
+        lock = SONG_LOCKS.setdefault(file, threading.Lock())
+    return lock
+
+
+def GetSong(file):
+    """Return the Mutagen song object for a file, loading it if necessary.
+    
+    Arguments:
+    file -- the music file to retrieve
+    
+    Returns:
+    The song object if successful
+    'None' if the file is inaccessible or not a supported type
+    """
+    
+    song = SONG_CACHE.get(file)
+    if song is not None:
+        return song
+    
+    song = OpenSong(file)
+    if song is not None:
+        SONG_CACHE[file] = song
+    return song
+
+
+def InsertRow(tree, meta):
+    """Insert a music file's metadata into the Treeview widget.
+    
+    This function must be called from the thread running the Tk mainloop.
+    
+    Arguments:
+    tree -- the Treeview widget (to insert the metadata info)
+    meta -- the FileMeta returned by ReadMetadata()
+    """
+    
+    # Call the Tk 'insert' command directly. 'tree.insert()' would first
+    #   build a keyword dict and convert it to a formatted option string,
+    #   while tkinter passes the values tuple straight through as a Tcl list
+    tree.tk.call(tree._w, 'insert', '', 'end', '-id', meta.iid,
+                 '-tags', meta.row_tag, '-values', meta.values)
+
+
+def InsertRows(tree, rows):
+    """Insert the metadata for a group of music files into the Treeview.
+    
+    All of the rows get inserted within a single Tk callback, so the
+        Treeview only lays out and redraws once after the whole group is in.
+    
+    Arguments:
+    tree -- the Treeview widget (to insert the metadata info)
+    rows -- list of FileMeta objects, one per music file
+    """
+    
+    for meta in rows:
+        InsertRow(tree, meta)
+
+
+def OpenSong(file):
+    """Load a music file from disk, letting Mutagen detect its type.
+    
+    Files are opened with Mutagen's 'easy' interface, so FLAC and MP3 files
+        (and any other type Mutagen supports) share the same tag names.
+    
+    Arguments:
+    file -- the music file to load
+    
+    Returns:
+    The song object if successful
+    'None' if the file is inaccessible or not a supported type
+    """
+    
+    try:
+        # Returns 'None' if Mutagen doesn't recognize the file type
+        return mutagen.File(file, easy=True)
+    except MutagenError:
+        return None
 
 
 def ParseFile(filename, tree, index):
-    """Load a music file and retrieve its metadata information.
+    """Load a music file and insert its metadata into the Treeview widget.
+    
+    Kept for callers that load one file at a time on the Tk thread. The
+        window itself reads files with ReadMetadata() on worker threads and
+        inserts them with InsertRows().
     
     Arguments:
     filename -- the music file to load
@@ -86,194 +280,199 @@ def ParseFile(filename, tree, index):
     'False' and the filename if a file is inaccessible
     """
     
-    # Attempt to load the song using Mutagen
-    try:
-        if ('.flac' in filename or '.FLAC' in filename):
-            song = FLAC(filename)
-        elif ('.mp3' in filename or '.MP3' in filename):
-            song = MP3(filename, ID3=EasyID3)
-        else:
-            # Selected file is not a currently supported type
-            return False, filename
-    
-    except MutagenError:
-        # Send file back so it isn't added to the final files list
+    result, meta = ReadMetadata(filename, index)
+    if not result:
         return False, filename
     
-    # 'song_iid' and '_tag' are both used by the treeview widget
-    song_iid = 'song' + str(index)
-    if index % 2 == 0:
-        _tag = 'evenrow'
-    else:
-        _tag = 'oddrow'
+    InsertRow(tree, meta)
+    return True, None
+
+
+def QueueSave(song):
+    """Queue a song object to be written to disk by the save threads.
     
-    # Retrieve the file metadata
-    short_name = os.path.basename(filename)
+    The caller must hold the song's file lock. A song that is already
+        waiting in the queue isn't added again, since the save threads
+        always write the song's current tags.
     
-    try:
-        track_no = song['TrackNumber'][0].split('/')[0]
-    except KeyError:
-        track_no = ''
+    Arguments:
+    song -- the Mutagen song object to save
+    """
     
-    try:
-        title = song['Title'][0]
-    except KeyError:
-        title = ''
+    if song.filename in PENDING_SAVES:
+        return
     
-    try:
-        album = song['Album'][0]
-    except KeyError:
-        album = ''
+    PENDING_SAVES.add(song.filename)
+    SAVE_QUEUE.put(song)
+
+
+def ReadMetadata(filename, index):
+    """Load a music file and retrieve its metadata information.
     
-    try:
-        date = song['Date'][0]
-    except KeyError:
-        date = ''
+    This function doesn't touch any widgets, so it is safe to call from a
+        worker thread.
     
-    try:
-        publisher = song['Organization'][0]
-    except KeyError:
-        publisher = ''
+    Arguments:
+    filename -- the music file to load
+    index -- the file's index within the list (to create the Treeview IID)
     
-    # 'Artist', 'Album Artist', and 'Genre' may have more than one entry.
-    #   Create a composite string for each with values separated by ';'
-    a_string = ''
-    try:
-        if len(song['Artist']) > 1:
-            for artist in song['Artist']:
-                a_string += artist + '; '
-            # Remove the final extra '; ' characters
-            a_string = a_string.rstrip().rstrip(';')
-        else:
-            a_string = song['Artist'][0]
-    except KeyError:
-        pass
+    Returns:
+    'True' and a FileMeta holding the file's metadata if successful
+    'False' and the filename if a file is inaccessible
+    """
     
-    aa_string = ''
-    try:
-        if len(song['AlbumArtist']) > 1:
-            for artist in song['AlbumArtist']:
-                aa_string += artist + '; '
-            # Remove the final extra '; ' characters
-            aa_string = aa_string.rstrip().rstrip(';')
-        else:
-            aa_string = song['AlbumArtist'][0]
-    except KeyError:
-        pass
+    # Attempt to load the song using Mutagen
+    song = OpenSong(filename)
+    if song is None:
+        # Send file back so it isn't added to the final files list
+        return False, filename
     
-    g_string = ''
-    try:
-        if len(song['Genre']) > 1:
-            for genre in song['Genre']:
-                g_string += genre + '; '
-            # Remove the final extra '; ' characters
-            g_string = g_string.rstrip().rstrip('; ')
-        else:
-            g_string = song['Genre'][0]
-    except KeyError:
-        pass
+    # Keep the song object so later edits don't need to reload the file
+    SONG_CACHE[filename] = song
     
-    # Insert the track data into the treeview object
-    tree.insert('', 'end', iid=song_iid, tags=_tag,
-                values=(track_no, short_name, title, a_string, aa_string,
-                        album, date, g_string, publisher))
+    # Retrieve the file metadata. tkinter's file dialogs return paths with
+    #   '/' separators even on Windows, so split on the alternate separator
+    #   as well when the platform has one
+    short_name = filename.rpartition(os.sep)[2]
+    if os.altsep:
+        short_name = short_name.rpartition(os.altsep)[2]
     
-    return True, None
+    # Retrieve the single-value tags. Many files are missing some of these,
+    #   so check for each tag instead of handling a KeyError
+    scalars = {tag: (song[tag][0] if tag in song else '')
+               for tag in SCALAR_TAGS}
+    
+    # Only keep the track number from a 'number/total' value
+    track_no = scalars['TrackNumber'].split('/')[0]
+    
+    # 'Artist', 'Album Artist', and 'Genre' may have more than one entry.
+    #   Create a composite string for each with values separated by '; '
+    multis = {tag: ('; '.join(song[tag]) if tag in song else '')
+              for tag in MULTI_TAGS}
+    
+    # 'iid' and 'row_tag' are both used by the treeview widget
+    return True, FileMeta(track_no=track_no,
+                          short_name=short_name,
+                          title=scalars['Title'],
+                          artist=multis['Artist'],
+                          album_artist=multis['AlbumArtist'],
+                          album=scalars['Album'],
+                          date=scalars['Date'],
+                          genre=multis['Genre'],
+                          publisher=scalars['Organization'],
+                          iid=f'song{index}',
+                          row_tag=ROW_TAGS[index & 1])
 
 
-def UpdateMetadata(file, tag, update_string):
-    """Update a specific metadata tag for a given file.
+def SaveWorker():
+    """Write queued songs to disk. This runs on the background save threads.
+    
+    Failed saves are reported by adding the filename to SAVE_ERRORS. The
+        failed song is also dropped from the cache, so its unsaved tags
+        aren't mistaken for the ones on disk and the next edit reloads it.
+    """
+    
+    while True:
+        song = SAVE_QUEUE.get()
+        try:
+            with GetLock(song.filename):
+                try:
+                    song.save()
+                except Exception:
+                    # Any error is reported, since an error that stopped the
+                    #   thread would leave FlushSaves() waiting forever
+                    SONG_CACHE.pop(song.filename, None)
+                    SAVE_ERRORS.put(song.filename)
+                finally:
+                    # Edits made after this point queue a new save
+                    PENDING_SAVES.discard(song.filename)
+        finally:
+            SAVE_QUEUE.task_done()
+
+
+def SetTag(song, tag, value):
+    """Set a metadata tag on a song object if the value is different.
     
     Arguments:
-    file -- the file to be updated
+    song -- the Mutagen song object to update
     tag -- the metadata tag to update
-    update_string -- the new value for the metadata tag
+    value -- the new value for the metadata tag
     
     Returns:
-    'True' and the column heading ID for the tag if successful
-    'False' and the filename if a file is inaccessible
+    'True' if the tag was changed and the song needs to be saved
+    'False' if the tag already held the value, or the song's format has no
+        field for the tag
     """
     
+    if song.get(tag) == [value]:
+        return False
+    
+    # Mutagen's easy interfaces map the tag names to each format's own
+    #   fields. Formats without a field for the tag (e.g., EasyID3 has no
+    #   'TrackTotal') raise a KeyError, and there's nothing to write
     try:
-        if ('.flac' in file or '.FLAC' in file):
-            song = FLAC(file)
-        elif ('.mp3' in file or '.MP3' in file):
-            song = MP3(file, ID3=EasyID3)
-        else:
-            return False, file
-        
-    except MutagenError:
-        return False, file
-        
-    song[tag] = update_string
-    song.save()
-            
-    # Find the column ID to return
-    col_no = ConvertTagToCol(tag)
-    return True, col_no
+        song[tag] = value
+    except KeyError:
+        return False
+    return True
 
 
-def UpdateTrackNumbers(file, iid, track_no):
-    """Update the track number metadata tag for the given file.
+def UpdateMetadata(file, tag, update_string, col_no=None):
+    """Update a specific metadata tag for a given file.
+    
+    The save is queued for the background save threads.
     
     Arguments:
-    file -- the file to update
-    iid -- the file's Treeview IID
-    track_no -- the track number to add to the file's metadata
+    file -- the file to be updated
+    tag -- the metadata tag to update
+    update_string -- the new value for the metadata tag
+    col_no -- the tag's column heading ID, if already known by the caller
     
     Returns:
-    'True' and 'None' if the operation is successful
+    'True' and the column heading ID for the tag if successful
     'False' and the filename if a file is inaccessible
     """
     
-    try:
-        if ('.flac' in file or '.FLAC' in file):
-            song = FLAC(file)
-        elif ('.mp3' in file or '.MP3' in file):
-            song = MP3(file, ID3=EasyID3)
-        else:
-            return False, file
-    
-    except MutagenError:
+    song = GetSong(file)
+    if song is None:
         return False, file
     
-    song['TrackNumber'] = str(track_no)
-    song.save()
+    with GetLock(file):
+        if SetTag(song, tag, update_string):
+            QueueSave(song)
     
-    return True, None
+    # Find the column ID to return, unless the caller already provided it
+    if col_no is None:
+        col_no = ConvertTagToCol(tag)
+    return True, col_no
 
 
-def UpdateTrackTitle(file, title, iid, index):
+def UpdateTrackTitle(file, title, iid):
     """Update the track title metadata tag for a given file.
     
     Arguments:
     file -- the file to update
-    title -- the title string pulled from the Listbox widget
+    title -- the track title from the Discogs release
     iid -- the file's Treeview IID
-    index -- counter that tracks the file's track number
     
     Returns:
-    'True' and the isolated track title string if successful
+    'True' and the track title string if successful
     'False' and the filename if a file is inaccessible
     """
     
-    try:
-        if ('.flac' in file or '.FLAC' in file):
-            song = FLAC(file)
-        elif ('.mp3' in file or '.MP3' in file):
-            song = MP3(file, ID3=EasyID3)
-        else:
-            return False, file
-    
-    except MutagenError:
+    song = GetSong(file)
+    if song is None:
         return False, file
     
-    # Remove the track number from the beginning of the title string
-    if index < 10:
-        title = title[3:]
-    else:
-        title = title[4:]
-    song['Title'] = title
-    song.save()
+    with GetLock(file):
+        if SetTag(song, 'Title', title):
+            QueueSave(song)
     
     return True, title
+
+
+# Start the background save threads. They're daemon threads so they never
+#   keep the program running, which means FlushSaves() must be called before
+#   exiting to avoid losing queued saves
+for _ in range(SAVE_THREADS):
+    threading.Thread(target=SaveWorker, daemon=True).start()
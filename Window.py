@@ -9,20 +9,42 @@
 #                                                                             #
 #   This module doesn't contain any of the code related to direct             #
 #       manipulation of file metadata information. That code can be found     #
-#       within 'FileData.py'.                                                 #
+#       within 'FileData.py'. The code that retrieves release information     #
+#       from the Discogs database can be found within 'DiscogsData.py'.       #
 #-----------------------------------------------------------------------------#
 
+from concurrent.futures import ThreadPoolExecutor
+import re
 import tkinter as tk
 from tkinter import filedialog
 from tkinter import messagebox
 from tkinter import Tk
 from tkinter import ttk
-from urllib.parse import urlparse
-
-import discogs_client
+from urllib.parse import urlsplit
 
+import DiscogsData
 import FileData
 
+
+# Matches the URL of a Discogs release, master release, or list page, with
+#   an optional scheme and language prefix (e.g., '/fr/'). Captures the page
+#   type and, if present, the ID that follows it. The ID has to end the path
+#   segment, so '/release/123abc' isn't read as release 123
+DISCOGS_URL_RE = re.compile(r'(?:https?://)?(?:www\.)?discogs\.com/'
+                            r'(?:[a-z-]+/)?(release|master|lists)/(\d+)?'
+                            r'(?=[-/?#]|$)',
+                            re.I)
+
+# URL schemes and network locations accepted by ParseURL()
+DISCOGS_SCHEMES = frozenset({'https', 'http'})
+DISCOGS_NETLOCS = frozenset({'www.discogs.com', 'discogs.com'})
+
+# Error shown for a Discogs URL that isn't a specific release version page
+UNSUPPORTED_URL_MSG = 'Unable to process the given URL.\n\n' \
+                      'If attempting to load a master release, please use ' \
+                      'a\nspecific release version instead.'
+
+
 class TagWindow(Tk):
 
     def __init__(self, *args, **kwargs):
@@ -42,6 +64,22 @@ class TagWindow(Tk):
         self.fg = '#f5fffa'
         self.font = ('Microsoft Tai Le', 12)
         
+        # Button options shared by every Button of each size. 'big' buttons
+        #   are all the buttons not directly tied to sending individual
+        #   metadata tags
+        button_opts = {'relief': 'groove', 'bg': self.bg,
+                       'activebackground': self.bg, 'fg': self.fg,
+                       'activeforeground': self.fg, 'takefocus': 0}
+        self.big_button_opts = {'height': 2, 'width': 40,
+                                'font': ('Microsoft Tai Le', 15),
+                                **button_opts}
+        self.small_button_opts = {'height': 1, 'width': 15,
+                                  'font': self.font, **button_opts}
+        
+        # Label options shared by every Label
+        self.label_opts = {'bg': self.bg, 'fg': self.fg, 'width': 10,
+                           'padx': 5, 'pady': 5}
+        
         # Boolean to determine if the user has provided their Discogs API token
         self.token_flag = False
         
@@ -51,47 +89,154 @@ class TagWindow(Tk):
         # Boolean to determine if music files have been added to the treeview
         self.files_loaded = False
         
+        # Boolean to determine if music files are still being read by the
+        #   worker threads
+        self.files_pending = False
+        
         # List that holds the file paths for loaded music files
         self.added_files = []
         
+        # Filename of each treeview row, keyed by the row's iid. Rows can be
+        #   looked up directly instead of searching for their position
+        self.file_by_iid = {}
+        
+        # Track titles of the loaded release, without the numbers shown in
+        #   the listbox
+        self.track_titles = []
+        
+        # Pop-up windows for editing a treeview cell and for entering the
+        #   user token. Each is created the first time it's needed, then
+        #   hidden and reused instead of being destroyed
+        self.edit_window = None
+        self.token_win = None
+        
+        # Thread pool used to read music file metadata in parallel and to
+        #   retrieve Discogs releases. It's kept for the lifetime of the window
+        #   so the threads get reused
+        self.executor = ThreadPoolExecutor(max_workers=16)
+        
         self.PopulateWindow()
+        
+        # File saves happen on a background thread. Make sure they all finish
+        #   before the window closes, and watch for any that fail
+        self.protocol('WM_DELETE_WINDOW', self.CloseWindow)
+        self.after(250, self.CheckSaveErrors)
     
     
     def AddFiles(self):
         """Add music files to the treeview for editing."""
         
+        # Wait for the previous selection to finish loading
+        if self.files_pending:
+            return
+        
+        # The new rows' iids would clash with the loaded ones, so files can
+        #   only be added to an empty window
+        if self.files_loaded:
+            msg = 'Reset window before attempting to add new files.'
+            tk.messagebox.showerror('Error', msg)
+            return
+        
         _types = (('FLAC', '*.flac'), ('MP3', '*.mp3'))
         files = list(filedialog.askopenfilenames(filetypes=_types))
         if not files:
             return
         
-        self.files_loaded = True
-        bad_files = []
-        for i, file in enumerate(files, 0):
-            
-            # If the operation is unsuccessful, 'bad_file' will contain the
-            #   filename of the inaccessible file
-            result, bad_file = FileData.ParseFile(file, self.tree, i)
-            if not result:
-                tk.messagebox.showerror('Error',
-                                        f'Unable to access {bad_file}')
-                # Add file index to list of inaccessible files
-                bad_files.append(i)
+        # Finish any queued saves so the files are read with their latest tags
+        FileData.FlushSaves()
         
-        if not bad_files:
-            self.added_files = files
-            return
+        # Read the file metadata on the worker threads. LoadFiles() adds the
+        #   results to the treeview once every file has been read
+        self.files_pending = True
+        futures = [self.executor.submit(FileData.ReadMetadata, file, i)
+                   for i, file in enumerate(files, 0)]
+        self.after(50, self.LoadFiles, files, futures)
+    
+    
+    def ApplyTreeUpdates(self, updates):
+        """Apply a batch of cell updates to the Treeview widget.
+        
+        The bulk editing functions schedule this with 'after_idle()' once
+            their loop finishes, so the cells are all changed together
+            instead of in between the file updates and error dialogs. Rows
+            with more than one new value are rewritten with a single
+            'item()' call instead of one 'set()' call per cell.
+        Arguments:
+        updates -- dict mapping each row's IID to a dict of its new column
+            values, keyed by column heading ID
+        """
         
-        # Create a new copy of the 'files' list without inaccessible files
-        self.added_files = []
-        for i, file in enumerate(files, 0):
-            if i in bad_files:
+        for iid, columns in updates.items():
+            
+            # Skip rows removed since the update was scheduled
+            if not self.tree.exists(iid):
                 continue
-            self.added_files.append(file)
+            
+            if len(columns) == 1:
+                (col_no, value), = columns.items()
+                self.tree.set(iid, col_no, value=value)
+                continue
+            
+            # Read the row's values straight from Tcl, since 'tree.item()'
+            #   converts numeric strings (e.g., track number '01') to ints
+            values = list(self.tree.tk.splitlist(
+                self.tree.tk.call(self.tree._w, 'item', iid, '-values')))
+            
+            # Column heading ID '#n' is the row's value at index n - 1
+            for col_no, value in columns.items():
+                values[int(col_no[1:]) - 1] = value
+            self.tree.item(iid, values=values)
+    
+    
+    def CheckSaveErrors(self):
+        """Report files the background save threads were unable to write.
+        
+        This function re-schedules itself to run periodically for as long
+            as the window exists.
+        """
+        
+        bad_names = []
+        while not FileData.SAVE_ERRORS.empty():
+            bad_names.append(FileData.SAVE_ERRORS.get())
+        
+        if bad_names:
+            bad_set = set(bad_names)
+            bad_iids = [iid for iid, file in self.file_by_iid.items()
+                        if file in bad_set]
+            
+            # The treeview rows were updated before the saves ran, so show
+            #   what's actually on disk again before reporting the errors
+            self.RevertRows(bad_iids)
+            
+            # List all of the files in one dialog and offer to remove the
+            #   ones still loaded from the program
+            self.ShowFileErrors('save', bad_names)
+            if bad_iids:
+                self.RemoveFiles(bad_iids)
+        
+        self.after(250, self.CheckSaveErrors)
+    
+    
+    def ClearCache(self):
+        """Remove all previously retrieved releases from the release cache.
+        
+        This function is called by the 'Clear Release Cache' button.
+        """
+        
+        DiscogsData.ClearCache()
+        msg = 'Releases will be retrieved from Discogs again.'
+        tk.messagebox.showinfo('Cache Cleared', msg)
+    
+    
+    def CloseWindow(self):
+        """Wait for any queued file saves to finish, then close the window."""
+        
+        FileData.FlushSaves()
+        self.destroy()
     
     
     def CopyTracklist(self):
-        """Copy track titles from the listbox to the music files.
+        """Copy track titles from the loaded release to the music files.
         
         This function is called by the 'Send Track Titles' button.
         """
@@ -99,6 +244,12 @@ class TagWindow(Tk):
         if not self.files_loaded:
             return
         
+        # There are no titles to copy until a release has been loaded
+        if not self.track_titles:
+            msg = 'Load a release before copying track titles.'
+            tk.messagebox.showerror('Error', msg)
+            return
+        
         # Show a warning message before allowing the titles to be altered
         msg = 'This action will copy the track titles to the listed files\n' \
               'in the file viewer below. Before proceeding, make sure the\n' \
@@ -106,33 +257,50 @@ class TagWindow(Tk):
               'Track numbers can be directly edited by double-clicking in\n' \
               'the "#" column. The list can be sorted into order by clicking\n' \
               'on the "#" column heading.\n\nProceed?'
-        ask = tk.messagebox.askquestion('WARNING', msg)
+        ask = tk.messagebox.askyesno('WARNING', msg)
         if not ask:
             return
         
-        bad_files = []
-        i = 0
-        for file, iid, title in zip(self.added_files, self.tree.get_children(),
-                                    self.listbox.get(0, 'end')):
+        # Retrieve the treeview rows once up front. The titles are kept
+        #   from when the release was loaded, so the listbox isn't queried
+        children = self.tree.get_children()
+        titles = self.track_titles
+        
+        # Only as many titles as there are files (or vice versa) can be
+        #   copied, so confirm before updating part of the files
+        n_files = len(self.added_files)
+        n_titles = len(titles)
+        if n_files != n_titles:
+            msg = f'There are {n_files} files and {n_titles} track titles.\n' \
+                  f'Copy the first {min(n_files, n_titles)} titles anyway?'
+            if not tk.messagebox.askyesno('Mismatch', msg):
+                return
+        
+        bad_iids = []
+        bad_names = []
+        tree_updates = {}
+        for file, iid, title in zip(self.added_files, children, titles):
             
             # If the operation is successful, 'res_str' contains the title
             #   string used to update the treeview widget. If unsuccessful,
             #   'res_str' contains the filename of the inaccessible file
-            result, res_str = FileData.UpdateTrackTitle(file, title, iid, i)
+            result, res_str = FileData.UpdateTrackTitle(file, title, iid)
             if not result:
-                tk.messagebox.showerror('Error', f'Unable to access {res_str}')
-                # Add file index to list of inaccessible files
-                bad_files.append(i)
+                # Add the row's iid to list of inaccessible files
+                bad_iids.append(iid)
+                bad_names.append(res_str)
             else:
-                # Update the treeview widget with the title
-                self.tree.set(iid, column='#3', value=res_str)
-            
-            i += 1
+                # Queue the treeview update with the title
+                tree_updates[iid] = {'#3': res_str}
         
-        # If inaccessible files were found, offer to remove them from the
-        #   program
-        if bad_files:
-            self.RemoveFiles(bad_files)
+        # Update the treeview widget once the loop has finished
+        self.after_idle(self.ApplyTreeUpdates, tree_updates)
+        
+        # If inaccessible files were found, list them all in one dialog and
+        #   offer to remove them from the program
+        if bad_iids:
+            self.ShowFileErrors('access', bad_names)
+            self.RemoveFiles(bad_iids)
     
     
     def CopyTrackNumbers(self):
@@ -144,28 +312,33 @@ class TagWindow(Tk):
         if not self.files_loaded:
             return
         
-        bad_files = []
-        i = 1
-        for file, iid in zip(self.added_files, self.tree.get_children()):
-            
-            # If the operation is unsuccessful, 'res_str' will contain the
-            #   filename of the inaccessible file
-            result, res_str = FileData.UpdateTrackNumbers(file, iid, i)
-            if not result:
-                # Add file to list of inaccessible files
-                tk.messagebox.showerror('Error', f'Unable to access {res_str}')
-                # Add file index to list of inaccessible files
-                bad_files.append(i)
+        # Write every track number in one batch so each file is only saved
+        #   once. The batch returns the filenames of any inaccessible files
+        updates = [(file, 'TrackNumber', str(i))
+                   for i, file in enumerate(self.added_files, 1)]
+        bad_names = FileData.BatchUpdateMetadata(updates)
+        bad_set = set(bad_names)
+        
+        children = self.tree.get_children()
+        bad_iids = []
+        tree_updates = {}
+        for (file, _, track_no), iid in zip(updates, children):
+            if file in bad_set:
+                # Add the row's iid to list of inaccessible files
+                bad_iids.append(iid)
             else:
-                # Update the treeview widget with the track number
-                self.tree.set(iid, column='#1', value=str(i))
-            
-            i += 1
-        
-        # If inaccessible files were found, offer to remove them from the
-        #   program
-        if bad_files:
-            self.RemoveFiles(bad_files)
+                # Queue the treeview update with the track number string
+                #   already built for the batch
+                tree_updates[iid] = {'#1': track_no}
+        
+        # Update the treeview widget once the loop has finished
+        self.after_idle(self.ApplyTreeUpdates, tree_updates)
+        
+        # If inaccessible files were found, list them all in one dialog and
+        #   offer to remove them from the program
+        if bad_iids:
+            self.ShowFileErrors('access', bad_names)
+            self.RemoveFiles(bad_iids)
     
     
     def CreateButton(self, parent, _text, _cmd, big_tag):
@@ -178,22 +351,54 @@ class TagWindow(Tk):
         big_tag -- boolean indicator for the size of Button features
         """
         
-        # 'big_tag' buttons are all the buttons not directly tied to sending
-        #   individual metadata tags
+        # The options for both sizes are built once in __init__()
         if big_tag:
-            _height = 2
-            _width = 40
-            _font = ('Microsoft Tai Le', 15)
+            opts = self.big_button_opts
         else:
-            _height = 1
-            _width = 15
-            _font = ('Microsoft Tai Le', 12)
-     
-        return tk.Button(parent, text=_text, command=_cmd, height=_height,
-                         width=_width, font=_font, relief='groove',
-                         bg=self.bg, activebackground=self.bg,
-                         fg=self.fg, activeforeground=self.fg,
-                         takefocus=0)
+            opts = self.small_button_opts
+        
+        return tk.Button(parent, text=_text, command=_cmd, **opts)
+    
+    
+    def CreateEditWindow(self):
+        """Initialize the hidden pop-up window used to edit Treeview cells.
+        
+        This function is called by DoubleClick() the first time a cell is
+            double-clicked. The window is withdrawn instead of destroyed, so
+            the same widgets are reused for every edit.
+        """
+        
+        self.edit_window = tk.Toplevel(self)
+        height = 100
+        width = 300
+        y_pos = int((self.winfo_screenheight() / 2) - (height / 2))
+        x_pos = int((self.winfo_screenwidth() / 2) - (width / 2))
+        self.edit_window.geometry(f'{width}x{height}+{x_pos}+{y_pos}')
+        
+        # Closing the window or pressing 'Escape' only hides it
+        self.edit_window.withdraw()
+        self.edit_window.protocol('WM_DELETE_WINDOW',
+                                  self.edit_window.withdraw)
+        self.edit_window.bind('<Escape>',
+                              lambda e: self.edit_window.withdraw())
+        
+        frame = self.CreateFrame(self.edit_window)
+        frame.pack(fill='both', expand='true')
+        
+        label = self.CreateLabel(frame, 'Enter new value:')
+        label.pack(fill='both', expand='true')
+        
+        self.new_value = tk.StringVar()
+        self.edit_entry = self.CreateEntry(frame, self.new_value)
+        self.edit_entry.pack(fill='x', expand='true')
+        
+        button = self.CreateButton(frame, 'Update Field', self.UpdateField,
+                                   big_tag=False)
+        button.pack(fill='both', expand='true')
+        
+        # Bind both 'Enter' keys to be equivalent to clicking the button
+        self.edit_window.bind('<Return>', lambda e: self.UpdateField())
+        self.edit_window.bind('<KP_Enter>', lambda e: self.UpdateField())
     
     
     def CreateEntry(self, parent, _var, _width=30):
@@ -277,7 +482,7 @@ class TagWindow(Tk):
             _font = self.font
     
         return tk.Label(parent, text=_text, font=_font, anchor=_anchor,
-                        bg=self.bg, fg=self.fg, width=10, padx=5, pady=5)
+                        **self.label_opts)
     
     
     def CreateLoadButtons(self, parent):
@@ -335,8 +540,21 @@ class TagWindow(Tk):
                                        _cmd=lambda: self.SendData(tag),
                                        big_tag=False)
             button.pack(side='left')
+            
+            # Register the Entry variable under its metadata tag, and mark
+            #   the tag as changed whenever the Entry's contents change
+            self.tag_vars[tag] = entry_var
+            entry_var.trace_add('write',
+                                lambda *args: self.pending_changes.add(tag))
         
         
+        # Dictionary that maps each metadata tag to its Entry variable
+        self.tag_vars = {}
+        
+        # Set of the metadata tags whose Entry contents haven't been sent to
+        #   the loaded files yet. UpdateAll() only writes these tags
+        self.pending_changes = set()
+        
         self.artist = tk.StringVar()
         CreateField(text_parent, 'Artist', 'Artist', self.artist)
         
@@ -365,6 +583,44 @@ class TagWindow(Tk):
         fill_button.pack(fill = 'x')
     
     
+    def CreateTokenWindow(self):
+        """Initialize the hidden pop-up window used to enter the user token.
+        
+        This function is called by GetUserToken() the first time a token is
+            needed. The window is withdrawn instead of destroyed, so it can be
+            shown again if Discogs rejects the token.
+        """
+        
+        token_h = 100
+        token_w = 300
+        
+        # Obtain x&y coordinates to place window in center of screen
+        y_pos = int((self.winfo_screenheight() / 2) - (token_h / 2))
+        x_pos = int((self.winfo_screenwidth() / 2) - (token_w / 2))
+        
+        self.token_win = tk.Toplevel(self)
+        self.token_win.geometry(f'{token_w}x{token_h}+{x_pos}+{y_pos}')
+        self.token_win.resizable(False, False)
+        
+        # Closing the window only hides it
+        self.token_win.withdraw()
+        self.token_win.protocol('WM_DELETE_WINDOW', self.token_win.withdraw)
+        
+        frame = self.CreateFrame(self.token_win)
+        frame.pack(fill='both', expand='true')
+        
+        label = self.CreateLabel(frame, 'Enter user token:')
+        label.pack(fill='both', expand='true')
+        
+        self.user_token = tk.StringVar()
+        self.token_entry = self.CreateEntry(frame, self.user_token)
+        self.token_entry.pack(fill='both', expand='true')
+        
+        button = self.CreateButton(frame, 'Submit', self.InitializeClient,
+                                   big_tag=False)
+        button.pack(fill='both', expand='true')
+    
+    
     def CreateTracklistView(self, parent):
         """Initialize Listbox widget that holds track titles.
         
@@ -406,96 +662,59 @@ class TagWindow(Tk):
         entry = self.CreateEntry(parent, self.URL, 100)
         entry.pack()
         
-        # Create URL load button and window reset button
+        # Create URL load button, window reset button, and cache clear button
         button_frame = self.CreateFrame(parent)
         button_frame.pack()
         
-        URL_button = self.CreateButton(button_frame, 'Click To Load URL Data',
-                                       self.ValidateURL, big_tag=True)
-        URL_button.pack(side='left')
+        self.URL_button = self.CreateButton(button_frame,
+                                            'Click To Load URL Data',
+                                            self.ValidateURL, big_tag=True)
+        self.URL_button.pack(side='left')
         
         reset_button = self.CreateButton(button_frame, 'Reset Window',
                                          self.ResetWindow, big_tag=True)
         reset_button.pack(side='right')
+        
+        cache_button = self.CreateButton(button_frame, 'Clear Release Cache',
+                                         self.ClearCache, big_tag=True)
+        cache_button.pack(side='right')
     
     
     def DoubleClick(self, event):
         """Edit the contents of a Treeview cell.
         
         This is an event function bound to double-clicking within the Treeview
-            widget. It becomes unbound when the edit window appears and gets
-            re-bound when the window is destroyed.
+            widget. Double-clicking another cell while the edit window is
+            open retargets the same window to that cell.
         """
     
         # Retrieve the chosen row and column
         self.clicked_column = self.tree.identify_column(event.x)
         self.clicked_row = self.tree.identify_row(event.y)
         
-        # Load a window to edit the value
-        self.edit_window = tk.Toplevel(self)
-        height = 100
-        width = 300
-        y_pos = int((self.winfo_screenheight() / 2) - (height / 2))
-        x_pos = int((self.winfo_screenwidth() / 2) - (width / 2))
-        self.edit_window.geometry(f'{width}x{height}+{x_pos}+{y_pos}')
-        
-        frame = self.CreateFrame(self.edit_window)
-        frame.pack(fill='both', expand='true')
-        
-        label = self.CreateLabel(frame, 'Enter new value:')
-        label.pack(fill='both', expand='true')
-        
-        self.new_value = tk.StringVar()
-        entry = self.CreateEntry(frame, self.new_value)
-        entry.pack(fill='x', expand='true')
-        entry.focus_force()
-        
-        button = self.CreateButton(frame, 'Update Field', self.UpdateField,
-                                   big_tag=False)
-        button.pack(fill='both', expand='true')
-        
-        # Bind both 'Enter' keys to be equivalent to clicking the button
-        self.edit_window.bind('<Return>', lambda e: self.UpdateField())
-        self.edit_window.bind('<KP_Enter>', lambda e: self.UpdateField())
-        
-        # Remove binding on double-click until the current edit window gets
-        #   destroyed
-        self.tree.unbind('<Double-Button-1>')
-        self.edit_window.bind('<Destroy>', self.RestoreDoubleClick)
+        # Show the window to edit the value, creating it on first use
+        if self.edit_window is None:
+            self.CreateEditWindow()
+        self.new_value.set('')
+        self.edit_window.deiconify()
+        self.edit_entry.focus_force()
     
     
     def FillEntrys(self):
-        """Populate metadata Entry widgets with corresponding Discogs info.
+        """Start retrieving the Discogs info for the metadata Entry widgets.
         
-        This function is called by the 'Click To Load URL Data' button. It
-            uses the Discogs client API to pull information for each metadata
-            tag.
+        This function is called by the 'Click To Load URL Data' button. The
+            release is retrieved on a worker thread so the window stays
+            responsive, and LoadRelease() fills the widgets once it arrives.
         """
         
-        try:
-            release = self.client.release(self.release_number)
-            
-            # Fill the text entry boxes
-            self.artist.set(release.artists[0].name.title())
-            self.album_artist.set(release.artists[0].name.title())
-            self.album.set(release.title.title())
-            self.genre.set(release.styles[0].title())
-            self.publisher.set(release.labels[0].name.title())
-            self.release_date.set(release.year)
-            
-            # Fill the 'tracklist' listbox
-            for i, track_title in enumerate(release.tracklist, 1):
-                self.listbox.insert('end', f'{i}. {track_title.title.title()}')
+        # Disable the URL button until the release arrives, so repeated
+        #   clicks don't start more requests for the same release
+        self.URL_button.config(state='disabled')
         
-        except:
-            msg = 'Release not found in Discogs database.\n' \
-                  'Please double-check the entered URL.'
-            tk.messagebox.showerror('Error', msg)
-            return
-        
-        # Update the flag to prevent loading new data until the window
-        #   gets reset
-        self.data_loaded = True
+        future = self.executor.submit(DiscogsData.FetchRelease, self.client,
+                                      self.rate_limiter, self.release_number)
+        self.after(50, self.LoadRelease, future)
     
     
     def GetUserToken(self):
@@ -506,53 +725,218 @@ class TagWindow(Tk):
             enable retrieving information from the Discogs database.
         """
     
-        token_h = 100
-        token_w = 300
+        # Show the token window, creating it on first use
+        if self.token_win is None:
+            self.CreateTokenWindow()
+        self.user_token.set('')
+        self.token_win.deiconify()
+        self.token_entry.focus_force()
     
-        # Obtain x&y coordinates to place window in center of screen
-        y_pos = int((self.winfo_screenheight() / 2) - (token_h / 2))
-        x_pos = int((self.winfo_screenwidth() / 2) - (token_w / 2))
+    
+    def InitializeClient(self):
+        """Initialize the Discogs API client.
         
-        self.token_win = tk.Toplevel(self)
-        self.token_win.geometry(f'{token_w}x{token_h}+{x_pos}+{y_pos}')
-        self.token_win.resizable(False, False)
+        This function is called by the 'Submit' button located on the window
+            created by GetUserToken().
+        """
         
-        frame = self.CreateFrame(self.token_win)
-        frame.pack(fill='both', expand='true')
+        token = self.user_token.get().strip()
+        if not token:
+            return
         
-        label = self.CreateLabel(frame, 'Enter user token:')
-        label.pack(fill='both', expand='true')
+        # 'discogs_client' is only imported once the user submits a token,
+        #   so starting the program and editing files doesn't wait on it
+        import discogs_client
         
-        self.user_token = tk.StringVar()
-        entry = self.CreateEntry(frame, self.user_token)
-        entry.pack(fill='both', expand='true')
-        entry.focus_force()
+        # Creating the client doesn't contact Discogs, so it can't fail for
+        #   an invalid token. That gets reported by LoadRelease() instead
+        self.client = discogs_client.Client('UpdateFiles', user_token=token)
+        self.rate_limiter = DiscogsData.RateLimiter()
         
-        button = self.CreateButton(frame, 'Submit', self.InitializeClient,
-                                   big_tag=False)
-        button.pack(fill='both', expand='true')
+        # The client's own backoff would retry a 429 many times before the
+        #   rate limiter ever saw it, so leave the retries to the limiter
+        self.client.backoff_enabled = False
+        
+        self.token_flag = True
+        self.token_win.withdraw()
+        self.FillEntrys()
     
     
-    def InitializeClient(self):
-        """Initialize the Discogs API client.
+    def LoadFiles(self, files, futures):
+        """Insert the metadata read by the worker threads into the treeview.
         
-        This function is called by the 'Submit' button located on the window
-            created by GetUserToken().
+        This function is scheduled by AddFiles() and re-schedules itself
+            until every file has been read.
+        Arguments:
+        files -- the list of selected music files
+        futures -- the pending results of FileData.ReadMetadata(), in the
+            same order as 'files'
         """
         
-        token = self.user_token.get().lstrip().rstrip()
-        if not token:
+        if not all(future.done() for future in futures):
+            self.after(50, self.LoadFiles, files, futures)
+            return
+        
+        self.files_pending = False
+        self.files_loaded = True
+        bad_files = []
+        bad_names = []
+        rows = []
+        file_by_iid = {}
+        for i, future in enumerate(futures, 0):
+            
+            # If the operation is successful, 'res' contains the FileMeta for
+            #   the treeview row. If unsuccessful, 'res' contains the filename
+            #   of the inaccessible file
+            result, res = future.result()
+            if not result:
+                # Add file index to list of inaccessible files
+                bad_files.append(i)
+                bad_names.append(res)
+            else:
+                rows.append(res)
+                file_by_iid[res.iid] = files[i]
+        
+        # Insert all of the rows at once on the main thread, then list any
+        #   inaccessible files in one dialog. The iid map is only replaced
+        #   once the rows are in, so it always matches the treeview
+        FileData.InsertRows(self.tree, rows)
+        self.file_by_iid = file_by_iid
+        if bad_names:
+            self.ShowFileErrors('access', bad_names)
+        
+        # None of the Entry contents have been sent to the new files yet
+        self.pending_changes.update(self.tag_vars)
+        
+        if not bad_files:
+            self.added_files = files
             return
         
+        # Create a new copy of the 'files' list without inaccessible files
+        bad_set = set(bad_files)
+        self.added_files = [file for i, file in enumerate(files, 0)
+                            if i not in bad_set]
+    
+    
+    def LoadRelease(self, future):
+        """Populate metadata Entry widgets with corresponding Discogs info.
+        
+        This function is scheduled by FillEntrys() and re-schedules itself
+            until the worker thread has finished retrieving the release.
+        Arguments:
+        future -- the pending result of DiscogsData.FetchRelease()
+        """
+        
+        if not future.done():
+            self.after(50, self.LoadRelease, future)
+            return
+        
+        self.URL_button.config(state='normal')
+        
+        # If unsuccessful, 'data' will contain the HTTP status code of the
+        #   failed request, or 'None' if Discogs couldn't be reached. Any
+        #   other error would otherwise be lost inside the Tk callback
         try:
-            self.client = discogs_client.Client('UpdateFiles', user_token=token)
-        except:
+            result, data = future.result()
+        except Exception:
             tk.messagebox.showerror('Error',
-                                    'Error authorizing provided credentials.')
-        else:
-            self.token_flag = True
-            self.token_win.destroy()
-            self.FillEntrys()
+                                    'Unable to load the release from Discogs.')
+            return
+        if not result:
+            if data == 404:
+                msg = 'Release not found in Discogs database.\n' \
+                      'Please double-check the entered URL.'
+            elif data == 429:
+                msg = 'Discogs is limiting requests right now.\n' \
+                      'Please wait a minute and try again.'
+            elif data == 401:
+                # Ask for the token again on the next attempt
+                self.token_flag = False
+                msg = 'Error authorizing provided credentials.'
+            elif data is None:
+                msg = 'Unable to connect to Discogs.\n' \
+                      'Please check your internet connection.'
+            else:
+                msg = f'Discogs returned an error ({data}).\n' \
+                      'Please try again later.'
+            tk.messagebox.showerror('Error', msg)
+            return
+        
+        # Fill the text entry boxes
+        self.artist.set(data['artist'])
+        self.album_artist.set(data['artist'])
+        self.album.set(data['album'])
+        self.genre.set(data['genre'])
+        self.publisher.set(data['publisher'])
+        self.release_date.set(data['year'])
+        
+        # Fill the 'tracklist' listbox. 'Listbox.insert()' takes any number
+        #   of elements, so every title is inserted in a single call
+        self.track_titles = data['tracklist']
+        titles = [f'{i}. {track_title}'
+                  for i, track_title in enumerate(self.track_titles, 1)]
+        self.listbox.insert('end', *titles)
+        
+        # Releases cached before the tracklist limit existed have no
+        #   'truncated' entry
+        if data.get('truncated'):
+            limit = DiscogsData.MAX_TRACKS
+            msg = f'This release has more than {limit} tracks.\n' \
+                  f'Only the first {limit} were loaded.'
+            tk.messagebox.showwarning('Warning', msg)
+        
+        # Update the flag to prevent loading new data until the window
+        #   gets reset
+        self.data_loaded = True
+    
+    
+    def ParseURL(self, URL_str):
+        """Isolate the release ID from a URL the URL regex didn't match.
+        
+        This function is called by ValidateURL() for URLs the regex doesn't
+            recognize, and reports why any that aren't for a release can't be
+            loaded.
+        
+        Arguments:
+        URL_str -- the stripped contents of the URL Entry widget
+        
+        Returns:
+        'True' if the release ID was stored in 'self.release_number'
+        'False' if the URL isn't for a specific Discogs release
+        """
+        
+        # A URL without a scheme (e.g., 'discogs.com/release/...') has its
+        #   domain parsed as part of the path, so parse it again with one
+        release_URL = urlsplit(URL_str)
+        if not release_URL.scheme and not release_URL.netloc:
+            release_URL = urlsplit('https://' + URL_str)
+        
+        # Validate that the URL is from discogs.com
+        if (release_URL.scheme not in DISCOGS_SCHEMES
+                or release_URL.netloc not in DISCOGS_NETLOCS):
+            tk.messagebox.showerror('Error',
+                                    'Please enter a URL from www.discogs.com')
+            return False
+        
+        # Isolate the page type and the release number from the path (e.g.,
+        #   '/release/123-Artist-Title'). Only the first two segments are
+        #   needed, so the rest of the path isn't split apart
+        _, _, rest = release_URL.path.partition('/')
+        page_type, _, rest = rest.partition('/')
+        segment, _, _ = rest.partition('/')
+        release_number, _, _ = segment.partition('-')
+        
+        # If the passed URL is valid but doesn't correspond to a specific
+        #   release version page (e.g., a master release, a community list
+        #   page, or the site's home page), attempting to load data throws an
+        #   error.
+        if page_type != 'release' or not release_number.isdigit():
+            tk.messagebox.showerror('Error', UNSUPPORTED_URL_MSG)
+            return False
+        
+        self.release_number = release_number
+        
+        return True
     
     
     def PopulateWindow(self):
@@ -595,13 +979,13 @@ class TagWindow(Tk):
         self.CreateFileTree(file_tree_frame)
     
     
-    def RemoveFiles(self, index_list):
+    def RemoveFiles(self, iid_list):
         """Remove inaccessible files from the Treeview widget.
         
         This function is called whenever another function attempts to edit
             metadata information and is unable to access/alter the file.
         Arguments:
-        index_list -- list of files list indeces that were inaccessible
+        iid_list -- list of the treeview iids of the inaccessible files
         """
         
         msg = 'Inaccessible files were found in the files list. Would\n' \
@@ -610,21 +994,16 @@ class TagWindow(Tk):
         if not ask:
             return
         
-        # Update the list of files added to the program
-        new_list = []
-        for i, file in enumerate(self.added_files, 0):
-            if i in index_list:
-                continue
-            new_list.append(file)
-        self.added_files = new_list
-        
-        # Remove the bad files from the treeview widget
-        tree_contents = self.tree.get_children()
-        iid_list = []
-        for index in index_list:
-            iid_list.append(tree_contents[index])
-        for iid in iid_list:
-            self.tree.delete(iid)
+        # Update the list of files added to the program. The rows are found
+        #   by iid, so their positions never need to be looked up
+        removed = [self.file_by_iid.pop(iid) for iid in iid_list]
+        removed_set = set(removed)
+        self.added_files = [file for file in self.added_files
+                            if file not in removed_set]
+        FileData.ForgetFiles(removed)
+        
+        # Remove the bad files from the treeview widget in a single call
+        self.tree.delete(*iid_list)
     
     
     def ResetWindow(self):
@@ -636,28 +1015,48 @@ class TagWindow(Tk):
         # Reset gobal variables
         self.data_loaded = False
         self.files_loaded = False
+        FileData.ForgetFiles(self.added_files)
         self.added_files = []
+        self.file_by_iid = {}
         
         # Reset entry variables
         self.URL.set('')
-        self.artist.set('')
-        self.album_artist.set('')
-        self.album.set('')
-        self.genre.set('')
-        self.publisher.set('')
-        self.release_date.set('')
-        self.total_tracks.set('')
-        
-        # Clear the listbox and treeview contents
+        for var in self.tag_vars.values():
+            var.set('')
+        
+        # Clear the listbox and treeview contents. 'Treeview.delete()' takes
+        #   any number of items, so every row is removed in a single call
         self.listbox.delete(0, 'end')
-        for iid in self.tree.get_children():
-            self.tree.delete(iid)
+        self.track_titles = []
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        
+        # Clearing the entry variables marked every tag as changed, but
+        #   there are no files left to send them to
+        self.pending_changes.clear()
     
     
-    def RestoreDoubleClick(self, event):
-        """Re-bind double-clicking to edit Treeview cells."""
+    def RevertRows(self, iid_list):
+        """Reload treeview rows from their files after failed saves.
         
-        self.tree.bind('<Double-Button-1>', self.DoubleClick)
+        Arguments:
+        iid_list -- list of the treeview iids of the files that failed
+        """
+        
+        if not iid_list:
+            return
+        
+        for iid in iid_list:
+            file = self.file_by_iid[iid]
+            with FileData.GetLock(file):
+                result, meta = FileData.ReadMetadata(file, 0)
+            if result:
+                self.tree.item(iid, values=meta.values)
+        
+        # The Entry contents may not have been written either, so
+        #   UpdateAll() has to send all of them again
+        self.pending_changes.update(self.tag_vars)
     
     
     def SendData(self, tag):
@@ -673,129 +1072,151 @@ class TagWindow(Tk):
         if not self.files_loaded:
             return
         
-        # Access the appropriate entry box variable
-        if tag == 'Album':
-            var_text = self.album.get().lstrip().rstrip()
-        elif tag == 'AlbumArtist':
-            var_text = self.album_artist.get().lstrip().rstrip()
-        elif tag == 'Artist':
-            var_text = self.artist.get().lstrip().rstrip()
-        elif tag == 'Date':
-            var_text = self.release_date.get().lstrip().rstrip()
-        elif tag == 'Genre':
-            var_text = self.genre.get().lstrip().rstrip()
-        elif tag == 'Organization':
-            var_text = self.publisher.get().lstrip().rstrip()
-        elif tag == 'TrackTotal':
-            var_text = self.total_tracks.get().lstrip().rstrip()
+        # Access the appropriate entry box variable. The tag no longer needs
+        #   to be sent by UpdateAll()
+        var_text = self.tag_vars[tag].get().strip()
+        self.pending_changes.discard(tag)
+        
+        # The treeview column is the same for every file, so look it up once.
+        #   Tags without a column (e.g., 'TrackTotal') aren't displayed
+        col_no = FileData.ConvertTagToCol(tag)
+        
+        # Update every file first, then make a single pass over the rows.
+        #   If unsuccessful, 'bad_set' will contain the filenames of the
+        #   inaccessible files
+        updates = [(file, tag, var_text) for file in self.added_files]
+        bad_set = set(FileData.BatchUpdateMetadata(updates))
+        
+        children = self.tree.get_children()
+        bad_iids = []
+        bad_names = []
+        tree_updates = {}
+        for file, iid in zip(self.added_files, children):
+            if file in bad_set:
+                # Add the row's iid to list of inaccessible files
+                bad_iids.append(iid)
+                bad_names.append(file)
+            elif col_no is not None:
+                # Queue the treeview update with the new metadata
+                tree_updates[iid] = {col_no: var_text}
+        
+        # Update the treeview widget once the loop has finished
+        self.after_idle(self.ApplyTreeUpdates, tree_updates)
+        
+        # If inaccessible files were found, list them all in one dialog and
+        #   offer to remove them from the program
+        if bad_iids:
+            self.ShowFileErrors('access', bad_names)
+            self.RemoveFiles(bad_iids)
+    
+    
+    def ShowFileErrors(self, action, bad_names):
+        """Show a single error dialog listing files that couldn't be used.
         
-        bad_files = []
-        i = 0
-        for file, iid in zip(self.added_files, self.tree.get_children()):
-            
-            # If the operation is successful, 'res_str' will contain the
-            #   treeview column that needs to be updated. If unsuccessful,
-            #   'res_str' will contain the filename of the inaccessible file
-            result, res_str = FileData.UpdateMetadata(file, tag, var_text)
-            if not result:
-                tk.messagebox.showerror('Error', f'Unable to access {res_str}')
-                # Add file index to list of inaccessible files
-                bad_files.append(i)
-            else:
-                # Update the treeview widget with the new metadata
-                self.tree.set(iid, res_str, value=var_text)
-            
-            i += 1
+        Arguments:
+        action -- the failed action, used in the message (e.g., 'access')
+        bad_names -- list of the filenames of the inaccessible files
+        """
         
-        # If inaccessible files were found, offer to remove them from the
-        #   program
-        if bad_files:
-            self.RemoveFiles(bad_files)
+        # Keep the dialog a reasonable size when many files fail at once
+        limit = 20
+        msg = f'Unable to {action}:\n' + '\n'.join(bad_names[:limit])
+        if len(bad_names) > limit:
+            msg += f'\n...and {len(bad_names) - limit} more'
+        tk.messagebox.showerror('Error', msg)
     
     
     def SortByTrackNumber(self):
         """Sort Treeview files by increasing track number column order."""
         
-        def SortFunc(e):
-            """Return int value for track number column cell."""
-            return int(self.tree.set(e, column='#1'))
-        
-        # Retrieve the iid for every treeview row
-        tree_contents = list(self.tree.get_children())
-        
-        # Sort list in ascending track number order
+        # Pair every treeview row's track number with its current position
+        #   and iid, reading each cell from the treeview only once. The rows
+        #   are always in the same order as 'self.added_files', so a row's
+        #   position is also the index of its file
         try:
-            tree_contents.sort(key=SortFunc)
+            rows = [(int(self.tree.set(iid, column='#1')), i, iid)
+                    for i, iid in enumerate(self.tree.get_children(), 0)]
         except ValueError:
             msg = 'One or more fields does not contain a number'
             tk.messagebox.showerror('Error', msg)
             return
-
-        # Update the treeview rows to match the sorted files
-        for i, iid in enumerate(tree_contents, 0):
-            self.tree.move(iid, '', i)
         
-        # Update the added files list to reflect the sort
-        added_copy = self.added_files.copy()
-        self.added_files = []
-        for iid in tree_contents:
-            # IID naming convention is 'song#', this isolates the '#'
-            index = int(iid[4:])
-            self.added_files.append(added_copy[index])
-        
-        # Update the tree item tags to maintain row coloring consistent
-        #   with the original creation style
-        for iid in tree_contents:
-            if (self.tree.index(iid)) % 2 == 0:
-                self.tree.item(iid, tags='evenrow')
-            else:
-                self.tree.item(iid, tags='oddrow')
+        # Sort list in ascending track number order
+        rows.sort(key=lambda row: row[0])
+        
+        # Update the added files list to reflect the sort. The right-hand
+        #   side is built before the old list is replaced, so no copy of it
+        #   is needed
+        self.added_files = [self.added_files[i] for _, i, _ in rows]
+        
+        # Move each row into place and update its tag to keep the row
+        #   coloring consistent with the original creation style. The row's
+        #   position in the sorted list is its new index, so 'tree.index()'
+        #   isn't needed
+        for i, (_, _, iid) in enumerate(rows, 0):
+            self.tree.move(iid, '', i)
+            self.tree.item(iid, tags=FileData.ROW_TAGS[i & 1])
     
     
     def UpdateAll(self):
         """Copy all data from metadata Entry widgets to loaded music files.
         
         This function is called by the 'Send All Data To Files' button. It does
-            not send the track titles from the Listbox.
+            not send the track titles from the Listbox. Only the tags whose
+            Entry contents changed since they were last sent get written, and
+            each file gets all of its changed tags in a single save. Empty
+            Entry widgets are skipped.
         """
         
-        if not self.files_loaded:
+        if not self.files_loaded or not self.pending_changes:
+            return
+        
+        # Empty fields are skipped, so they don't wipe the files' tags
+        values = [(tag, self.tag_vars[tag].get().strip())
+                  for tag in self.tag_vars if tag in self.pending_changes]
+        data = [(tag, value) for tag, value in values if value]
+        self.pending_changes.clear()
+        if not data:
             return
         
-        data = [['Album', self.album.get().lstrip().rstrip()],
-                ['AlbumArtist', self.album_artist.get().lstrip().rstrip()],
-                ['Artist', self.artist.get().lstrip().rstrip()],
-                ['Date', self.release_date.get().lstrip().rstrip()],
-                ['Genre', self.genre.get().lstrip().rstrip()],
-                ['Organization', self.publisher.get().lstrip().rstrip()],
-                ['TrackTotal', self.total_tracks.get().lstrip().rstrip()]]
-        
-        for entry in data:
-            bad_files = []
-            i = 0
-            for file, iid in zip(self.added_files, self.tree.get_children()):
-                
-                # If the operation is successful, 'res_str' will contain the
-                #   treeview column that needs to be updated. If unsuccessful,
-                #   'res_str' will contain the filename of the inaccessible
-                #   file
-                result, res_str = FileData.UpdateMetadata(file, entry[0],
-                                                          entry[1])
-                if not result:
-                    tk.messagebox.showerror('Error',
-                                            f'Unable to access {res_str}')
-                    # Add file index to list of inaccessible files
-                    bad_files.append(i)
-                else:
-                    # Update the treeview widget with the new metadata
-                    self.tree.set(iid, res_str, value=entry[1])
-                
-                i += 1
+        # The changed columns are the same for every file, so find them
+        #   once. Tags without a column (e.g., 'TrackTotal') aren't displayed
+        columns = {}
+        for tag, value in data:
+            col_no = FileData.ConvertTagToCol(tag)
+            if col_no is not None:
+                columns[col_no] = value
+        
+        # Apply every changed tag to each file at once. If unsuccessful,
+        #   'bad_set' will contain the filenames of the inaccessible files
+        updates = [(file, tag, value) for file in self.added_files
+                   for tag, value in data]
+        bad_set = set(FileData.BatchUpdateMetadata(updates))
+        
+        bad_iids = []
+        bad_names = []
+        tree_updates = {}
+        children = self.tree.get_children()
+        for file, iid in zip(self.added_files, children):
+            if file in bad_set:
+                # Add the row's iid to list of inaccessible files
+                bad_iids.append(iid)
+                bad_names.append(file)
+                continue
             
-            # If inaccessible files were found, offer to remove them from the
-            #   program
-            if bad_files:
-                self.RemoveFiles(bad_files)
+            # Queue the treeview update with the new metadata. If none of
+            #   the changed tags has a column, the row is left alone
+            if columns:
+                tree_updates[iid] = columns
+        
+        # Update the treeview widget once the loop has finished
+        self.after_idle(self.ApplyTreeUpdates, tree_updates)
+        
+        # If inaccessible files were found, list them all in one dialog and
+        #   offer to remove them from the program
+        if bad_iids:
+            self.ShowFileErrors('access', bad_names)
+            self.RemoveFiles(bad_iids)
     
     
     def UpdateField(self):
@@ -805,35 +1226,44 @@ class TagWindow(Tk):
             pop-up window created by the DoubleClick() function.
         """
         
-        _value = self.new_value.get().lstrip().rstrip()
+        _value = self.new_value.get().strip()
         if not _value:
             return
         
+        # Take no action if the double-click wasn't on a file's row (e.g.,
+        #   on a column heading or the empty space below the rows)
+        if self.clicked_row not in self.file_by_iid:
+            self.edit_window.withdraw()
+            return
+        
         # Retrieve the filename to update
-        file = self.added_files[self.tree.index(self.clicked_row)]
+        file = self.file_by_iid[self.clicked_row]
         
-        # Retrieve the metadata tag for the cell
+        # Retrieve the metadata tag for the cell. The edit overwrites that
+        #   tag's Entry contents in the file, so UpdateAll() has to send them
+        #   again
         tag = FileData.ConvertColToTag(self.clicked_column)
+        if tag in self.tag_vars:
+            self.pending_changes.add(tag)
         
         # If the operation is successful, 'res_str' will contain the treeview
         #   column that needs to be updated. If unsuccessful, 'res_str' will
         #   contain the filename of the inaccessible file
-        result, res_str = FileData.UpdateMetadata(file, tag, _value)
+        result, res_str = FileData.UpdateMetadata(file, tag, _value,
+                                                  self.clicked_column)
+        
+        # Hide the window until the next double-click. It's hidden before
+        #   any error dialog is shown, so the two don't compete for focus
+        self.edit_window.withdraw()
+        
         if not result:
             tk.messagebox.showerror('Error', f'Unable to access {res_str}')
             # Offer to remove the inaccessible file. The RemoveFiles() function
             #   expects a list as an arg
-            bad_file = []
-            bad_file.append(self.tree.index(self.clicked_row))
-            self.RemoveFiles(bad_file)
+            self.RemoveFiles([self.clicked_row])
         else:
             # Update the treeview widget with the new metadata
             self.tree.set(self.clicked_row, res_str, value=_value)
-        
-        # Unbind the enter keys and destroy the window
-        self.edit_window.unbind('<Return>')
-        self.edit_window.unbind('<KP_Enter>')
-        self.edit_window.destroy()
     
     
     def ValidateURL(self):
@@ -851,56 +1281,22 @@ class TagWindow(Tk):
             return
         
         # Take no action if URL field is empty
-        URL_str = self.URL.get().lstrip().rstrip()
+        URL_str = self.URL.get().strip()
         if not URL_str:
             return
         
-        # Validate that the URL is from discogs.com
-        release_URL = urlparse(URL_str)
-        valid_URL = False
-        if (release_URL.scheme == 'https' or release_URL.scheme == 'http'):
-            
-            if (release_URL.netloc == 'www.discogs.com'
-                    or release_URL.netloc == 'discogs.com'):
-                # URL is valid, retrieve the release path
-                valid_URL = True
-                release_path = release_URL.path
-        
-        elif (not release_URL.scheme and not release_URL.netloc):
-            splice1 = release_URL.path[:11]
-            splice2 = release_URL.path[:15]
-            
-            if splice1 == 'discogs.com':
-                # URL is valid, retrieve the release path
-                valid_URL = True
-                release_path = release_URL.path[11:]
-            
-            elif splice2 == 'www.discogs.com':
-                # URL is valid, retrieve the release path
-                valid_URL = True
-                release_path = release_URL.path[15:]
-        
-        if not valid_URL:
-            tk.messagebox.showerror('Error',
-                                    'Please enter a URL from www.discogs.com')
+        # Match the URL against the URL regex first. Master release and
+        #   list pages can be rejected right away. Anything else is parsed
+        #   apart by ParseURL()
+        match = DISCOGS_URL_RE.match(URL_str)
+        if match and match.group(1).lower() == 'release' and match.group(2):
+            self.release_number = match.group(2)
+        elif match:
+            tk.messagebox.showerror('Error', UNSUPPORTED_URL_MSG)
             return
-        
-        # Split the release path to isolate the release number
-        path_split = release_path.split('/')
-        
-        # If the passed URL is valid but doesn't correspond to a specific
-        #   release version page (e.g., a master release or a community list
-        #   page), attempting to load data throws an error.
-        if path_split[1] != 'release':
-            msg = 'Unable to process the given URL.\n\n' \
-                  'If attempting to load a master release, please use a\n' \
-                  'specific release version instead.'
-            tk.messagebox.showerror('Error', msg)
+        elif not self.ParseURL(URL_str):
             return
         
-        path_split = path_split[2].split('-')
-        self.release_number = path_split[0]
-        
         # If the URL is valid and the user has already provided their Discogs
         #   API user token, populate the entry widgets. Otherwise, call the
         #   function to get the user's token
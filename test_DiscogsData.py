@@ -0,0 +1,96 @@
+#-----------------------------------------------------------------------------#
+#   File: test_DiscogsData.py                                                 #
+#                                                                             #
+#   Tests for the Discogs request handling in 'DiscogsData.py'. The Discogs   #
+#       client is replaced by a small fake that raises the same exceptions    #
+#       as 'discogs_client', so no requests are sent.                         #
+#-----------------------------------------------------------------------------#
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from discogs_client.exceptions import HTTPError
+
+import DiscogsData
+
+
+class FakeClient:
+    """Stand-in Discogs client that fails with the given status codes."""
+    
+    def __init__(self, *status_codes):
+        self.status_codes = list(status_codes)
+        self.calls = 0
+    
+    
+    def release(self, release_number):
+        self.calls += 1
+        raise HTTPError('Request failed', self.status_codes.pop(0))
+
+
+class RateLimiterTest(unittest.TestCase):
+    
+    def setUp(self):
+        # Refill tokens quickly so retries don't wait on the real rate
+        self.limiter = DiscogsData.RateLimiter(rate=10, per=0.01,
+                                               base_delay=0)
+    
+    
+    def testRateLimitErrorDrainsAndRetries(self):
+        
+        responses = [HTTPError('Too Many Requests', 429), 'release']
+        
+        def Request():
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        
+        with mock.patch.object(self.limiter, 'Drain',
+                               wraps=self.limiter.Drain) as drain:
+            self.assertEqual(self.limiter.Call(Request), 'release')
+        drain.assert_called_once_with()
+    
+    
+    def testNotFoundErrorIsNotRetried(self):
+        
+        client = FakeClient(404)
+        with mock.patch.object(self.limiter, 'Drain') as drain:
+            with self.assertRaises(HTTPError):
+                self.limiter.Call(client.release, 1)
+        self.assertEqual(client.calls, 1)
+        drain.assert_not_called()
+
+
+class FetchReleaseTest(unittest.TestCase):
+    
+    def setUp(self):
+        # Keep the release cache out of the user's home directory
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        patcher = mock.patch.object(DiscogsData, 'CACHE_PATH',
+                                    os.path.join(cache_dir.name, 'releases'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.limiter = DiscogsData.RateLimiter(rate=10, per=0.01,
+                                               max_attempts=3, base_delay=0)
+    
+    
+    def testRateLimitErrorReturnsStatusCode(self):
+        
+        client = FakeClient(429, 429, 429)
+        with mock.patch.object(self.limiter, 'Drain',
+                               wraps=self.limiter.Drain) as drain:
+            result = DiscogsData.FetchRelease(client, self.limiter, 1)
+        self.assertEqual(result, (False, 429))
+        self.assertEqual(client.calls, 3)
+        
+        # The last attempt isn't followed by another one, so it doesn't
+        #   drain the limiter
+        self.assertEqual(drain.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
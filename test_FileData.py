@@ -0,0 +1,42 @@
+#-----------------------------------------------------------------------------#
+#   File: test_FileData.py                                                    #
+#                                                                             #
+#   Tests for the background save threads in 'FileData.py'. The songs are     #
+#       stand-in objects, so no music files are needed.                       #
+#-----------------------------------------------------------------------------#
+
+import unittest
+
+import FileData
+
+
+class FailingSong:
+    """Stand-in song object whose save always raises the given error."""
+    
+    def __init__(self, filename, error):
+        self.filename = filename
+        self.error = error
+    
+    
+    def save(self):
+        raise self.error
+
+
+class SaveWorkerTest(unittest.TestCase):
+    
+    def testUnexpectedErrorIsReported(self):
+        
+        song = FailingSong('broken.flac', ValueError('bad frame'))
+        FileData.SONG_CACHE[song.filename] = song
+        with FileData.GetLock(song.filename):
+            FileData.QueueSave(song)
+        
+        # The save threads must keep working, or this would never return
+        FileData.FlushSaves()
+        self.assertEqual(FileData.SAVE_ERRORS.get_nowait(), song.filename)
+        self.assertNotIn(song.filename, FileData.PENDING_SAVES)
+        self.assertNotIn(song.filename, FileData.SONG_CACHE)
+
+
+if __name__ == '__main__':
+    unittest.main()
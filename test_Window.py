@@ -0,0 +1,104 @@
+#-----------------------------------------------------------------------------#
+#   File: test_Window.py                                                      #
+#                                                                             #
+#   Tests for the parts of 'Window.py' that don't need the window to be       #
+#       shown. Methods are called on a stand-in object with only the          #
+#       attributes they use, and the message boxes are patched out.           #
+#-----------------------------------------------------------------------------#
+
+from concurrent.futures import Future
+from types import SimpleNamespace
+import unittest
+from unittest import mock
+
+import Window
+
+
+class DiscogsURLTest(unittest.TestCase):
+    
+    def Match(self, URL_str):
+        """Return the page type and ID matched by the URL regex, if any."""
+        
+        match = Window.DISCOGS_URL_RE.match(URL_str)
+        return match.groups() if match else None
+    
+    
+    def ParseURL(self, URL_str):
+        """Run ParseURL() and return the stored release number, if any."""
+        
+        window = SimpleNamespace(release_number=None)
+        with mock.patch.object(Window.tk.messagebox, 'showerror'):
+            if not Window.TagWindow.ParseURL(window, URL_str):
+                return None
+        return window.release_number
+    
+    
+    def testReleaseURLs(self):
+        
+        for URL_str in ('https://www.discogs.com/release/123-Artist-Title',
+                        'http://discogs.com/release/123',
+                        'discogs.com/release/123/',
+                        'www.discogs.com/fr/release/123?ev=rr',
+                        'https://www.discogs.com/release/123#images'):
+            with self.subTest(URL_str=URL_str):
+                self.assertEqual(self.Match(URL_str), ('release', '123'))
+    
+    
+    def testOtherPageURLs(self):
+        
+        self.assertEqual(self.Match('https://www.discogs.com/master/45-X'),
+                         ('master', '45'))
+        self.assertEqual(self.Match('https://www.discogs.com/release/'),
+                         ('release', None))
+    
+    
+    def testIDMustEndTheSegment(self):
+        
+        # The regex and ParseURL() have to agree that this isn't release 123
+        URL_str = 'https://www.discogs.com/release/123abc'
+        self.assertIsNone(self.Match(URL_str))
+        self.assertIsNone(self.ParseURL(URL_str))
+    
+    
+    def testParseURL(self):
+        
+        self.assertEqual(self.ParseURL('https://discogs.com/release/123-X'),
+                         '123')
+        self.assertIsNone(self.ParseURL('https://example.com/release/123'))
+        self.assertIsNone(self.ParseURL('https://discogs.com/master/123'))
+
+
+class LoadReleaseTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.window = SimpleNamespace(URL_button=mock.Mock(), token_flag=True)
+    
+    
+    def LoadFailure(self, status_code):
+        """Run LoadRelease() for a failed request and return the message."""
+        
+        future = Future()
+        future.set_result((False, status_code))
+        with mock.patch.object(Window.tk.messagebox, 'showerror') as error:
+            Window.TagWindow.LoadRelease(self.window, future)
+        
+        self.window.URL_button.config.assert_called_once_with(state='normal')
+        error.assert_called_once()
+        return error.call_args[0][1]
+    
+    
+    def testRateLimitMessage(self):
+        
+        msg = self.LoadFailure(429)
+        self.assertIn('limiting requests', msg)
+        self.assertNotIn('not found', msg)
+    
+    
+    def testNotFoundMessage(self):
+        
+        msg = self.LoadFailure(404)
+        self.assertIn('not found', msg)
+
+
+if __name__ == '__main__':
+    unittest.main()